@@ -8,7 +8,9 @@ per-metric cooldown + recovery message), and applies retention.
 from __future__ import annotations
 
 import datetime as dt
+import logging
 import os
+import sqlite3
 from typing import Any
 
 import requests
@@ -21,7 +23,8 @@ ENV = sm.load_env()
 BOT_TOKEN = ENV.get("BOT_TOKEN")
 CHAT_ID = ENV.get("CHAT_ID")
 
-logger = sm.get_logger("monitor", os.path.join(sm.LOG_DIR, "monitor.log"))
+logger = sm.get_logger("monitor", os.path.join(sm.LOG_DIR, "monitor.log"),
+                       console=bool(CONFIG.get("log_console", True)))
 
 
 # ---------------------------------------------------------------------------
@@ -44,14 +47,31 @@ def _telegram_send(text: str) -> None:
         logger.warning("Telegram network error: %s", e)
 
 
-def _check_alerts(metrics: sm.Metrics, state: dict[str, Any]) -> None:
+# (threshold key, Metrics attribute, emoji, label, unit) for each alertable metric.
+_ALERT_SPECS = (
+    ("cpu_load", "cpu_load", "⚠️", "CPU load", "%"),
+    ("ram_usage", "ram_usage", "⚠️", "RAM usage", "%"),
+    ("disk_usage", "disk_usage", "⚠️", "Disk usage", "%"),
+    ("power", "power_estimation", "⚡", "Power", "W"),
+    ("temperature", "temperature", "🔥", "Temperature", "°C"),
+)
+
+# (metric, event, value, threshold) rows destined for the alert_events table.
+AlertEvent = tuple[str, str, float, float]
+
+
+def _check_alerts(metrics: sm.Metrics, state: dict[str, Any]) -> tuple[list[str], list[AlertEvent]]:
     """Edge-triggered alerts with cooldown + recovery messages.
 
-    Each fired alert is also recorded in the alert_events table for history.
+    Returns (messages to send, events to record). Nothing is sent or written
+    here so the caller can commit the events in the same transaction as the
+    metric row and only then talk to Telegram.
     """
+    messages: list[str] = []
+    events: list[AlertEvent] = []
     cfg_alerts = CONFIG.get("alerts", {})
     if not cfg_alerts.get("enabled", True):
-        return
+        return messages, events
 
     thresholds = CONFIG.get("thresholds", {})
     cooldown = dt.timedelta(minutes=int(cfg_alerts.get("cooldown_minutes", 30)))
@@ -59,25 +79,17 @@ def _check_alerts(metrics: sm.Metrics, state: dict[str, Any]) -> None:
     alert_state = state.setdefault("alerts", {})
     now = dt.datetime.now()
 
-    checks = [
-        ("cpu_load", metrics.cpu_load, "⚠️", "CPU load", "%"),
-        ("ram_usage", metrics.ram_usage, "⚠️", "RAM usage", "%"),
-        ("disk_usage", metrics.disk_usage, "⚠️", "Disk usage", "%"),
-        ("power", metrics.power_estimation, "⚡", "Power", "W"),
-    ]
-    if metrics.temperature is not None:
-        checks.append(("temperature", metrics.temperature, "🔥", "Temperature", "°C"))
-
-    for key, value, emoji, label, unit in checks:
+    for key, attr, emoji, label, unit in _ALERT_SPECS:
         threshold = thresholds.get(key)
-        if threshold is None:
+        value = getattr(metrics, attr)
+        if threshold is None or value is None:
             continue
         s = alert_state.setdefault(key, {"active": False, "last_sent": ""})
         breached = value > threshold
 
         if breached and not s["active"]:
-            _telegram_send(f"{emoji} *High {label}*: `{value:.2f}{unit}` (> {threshold}{unit})")
-            sm.db_insert_alert(key, "breach", value, threshold)
+            messages.append(f"{emoji} *High {label}*: `{value:.2f}{unit}` (> {threshold}{unit})")
+            events.append((key, "breach", value, threshold))
             s["active"] = True
             s["last_sent"] = now.isoformat()
         elif breached and s["active"]:
@@ -87,15 +99,16 @@ def _check_alerts(metrics: sm.Metrics, state: dict[str, Any]) -> None:
             except ValueError:
                 last = now - cooldown
             if now - last >= cooldown:
-                _telegram_send(f"{emoji} *Still high — {label}*: `{value:.2f}{unit}`")
-                sm.db_insert_alert(key, "continued", value, threshold)
+                messages.append(f"{emoji} *Still high — {label}*: `{value:.2f}{unit}`")
+                events.append((key, "continued", value, threshold))
                 s["last_sent"] = now.isoformat()
         elif (not breached) and s["active"]:
             s["active"] = False
             s["last_sent"] = now.isoformat()
-            sm.db_insert_alert(key, "recovery", value, threshold)
+            events.append((key, "recovery", value, threshold))
             if send_recovery:
-                _telegram_send(f"✅ *Recovered — {label}*: `{value:.2f}{unit}` (≤ {threshold}{unit})")
+                messages.append(f"✅ *Recovered — {label}*: `{value:.2f}{unit}` (≤ {threshold}{unit})")
+    return messages, events
 
 
 # ---------------------------------------------------------------------------
@@ -103,14 +116,30 @@ def _check_alerts(metrics: sm.Metrics, state: dict[str, Any]) -> None:
 # ---------------------------------------------------------------------------
 
 def main() -> None:
-    auto_migrate = bool(CONFIG.get("storage", {}).get("auto_migrate_csv", True))
-    sm.db_init(auto_migrate=auto_migrate)
+    # Schema only; the legacy CSV import (if still pending) runs after this
+    # run's sample is stored and sent, so it never delays the sample.
+    sm.db_init(auto_migrate=False)
 
     state = sm.load_state()
-    metrics = sm.collect_metrics(CONFIG.get("power_model", {}), blocking=True)
+    prev = state.get("last", {})
+
+    # CPU % over the interval since the previous run, from cumulative CPU
+    # times kept in the state file. Avoids psutil's blocking sample; falls
+    # back to it on the first run, after a reboot, or after a long gap.
+    cpu_now = sm.cpu_times_snapshot()
+    cpu_usage = None
+    prev_cpu = prev.get("cpu_times")
+    if prev_cpu and prev.get("timestamp"):
+        try:
+            age = (dt.datetime.now() - dt.datetime.fromisoformat(prev["timestamp"])).total_seconds()
+        except ValueError:
+            age = -1.0
+        if 0 < age < 600:
+            cpu_usage = sm.cpu_usage_between(prev_cpu, cpu_now)
+    metrics = sm.collect_metrics(CONFIG.get("power_model", {}),
+                                 blocking=cpu_usage is None, cpu_usage=cpu_usage)
 
     # Net delta vs. previous run, with reboot-counter-reset handling
-    prev = state.get("last", {})
     prev_sent = float(prev.get("net_sent_mb", metrics.net_sent_mb))
     prev_recv = float(prev.get("net_recv_mb", metrics.net_recv_mb))
     metrics.net_sent_delta_mb = max(0.0, metrics.net_sent_mb - prev_sent)
@@ -136,7 +165,24 @@ def main() -> None:
         metrics.disk_read_mb_s = max(0.0, (cur_read_mb - prev_read) / elapsed_seconds)
         metrics.disk_write_mb_s = max(0.0, (cur_write_mb - prev_write) / elapsed_seconds)
 
-    sm.db_insert_metric(metrics, interval_wh)
+    messages, events = _check_alerts(metrics, state)
+
+    # One connection + one transaction for the whole pass: a single WAL
+    # commit instead of one per row.
+    with sm.db_connect() as conn:
+        conn.execute("BEGIN")
+        try:
+            sm.db_insert_metric(metrics, interval_wh, conn=conn)
+            for metric, event, value, threshold in events:
+                sm.db_insert_alert(metric, event, value, threshold, conn=conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    if messages:
+        # One sendMessage per run no matter how many metrics fired.
+        _telegram_send("\n".join(messages))
 
     state["last"] = {
         "timestamp": metrics.timestamp.isoformat(),
@@ -144,30 +190,36 @@ def main() -> None:
         "net_recv_mb": metrics.net_recv_mb,
         "disk_read_mb": cur_read_mb,
         "disk_write_mb": cur_write_mb,
+        "cpu_times": cpu_now,
     }
 
-    _check_alerts(metrics, state)
-    sm.save_state(state)
+    if CONFIG.get("storage", {}).get("auto_migrate_csv", True):
+        sm.db_import_legacy_csv_if_pending()
 
-    # Retention
+    # Retention: at most once per local day, keyed on the date cached in the
+    # state file, and folded into the pass's single state write.
     retention = int(CONFIG.get("storage", {}).get("retention_days", 365))
-    if retention > 0:
-        # Run prune at most once a day to avoid pointless writes
-        last_prune = state.get("last_prune_date")
-        today = dt.date.today().isoformat()
-        if last_prune != today:
+    today = dt.date.today().isoformat()
+    if retention > 0 and state.get("last_prune_date") != today:
+        try:
             removed = sm.db_purge_older_than(retention)
+        except sqlite3.Error:
+            logger.exception("Retention prune failed; will retry next run")
+        else:
             state["last_prune_date"] = today
-            sm.save_state(state)
             if removed:
                 logger.info("Pruned %d rows older than %d days", removed, retention)
 
-    logger.debug(
-        "logged cpu=%.1f temp=%s ram=%.1f disk=%.1f power=%.2f wh=%.4f",
-        metrics.cpu_load,
-        f"{metrics.temperature:.1f}" if metrics.temperature is not None else "n/a",
-        metrics.ram_usage, metrics.disk_usage, metrics.power_estimation, interval_wh,
-    )
+    sm.save_state(state)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        # Guarded: the temperature label is formatted eagerly.
+        logger.debug(
+            "logged cpu=%.1f temp=%s ram=%.1f disk=%.1f power=%.2f wh=%.4f",
+            metrics.cpu_load,
+            f"{metrics.temperature:.1f}" if metrics.temperature is not None else "n/a",
+            metrics.ram_usage, metrics.disk_usage, metrics.power_estimation, interval_wh,
+        )
 
 
 if __name__ == "__main__":
@@ -657,7 +657,7 @@ def cmd_logger_run(args) -> int:
 
 def cmd_bot_run(args) -> int:
     import tg_bot_loop
-    tg_bot_loop.poll_loop()
+    tg_bot_loop.main()
     return 0
 
 
@@ -13,25 +13,35 @@ long-running Telegram bot.
 
 from __future__ import annotations
 
+import atexit
+import copy
 import csv
 import datetime as dt
+import functools
 import json
 import logging
 import os
 import platform
+import queue
 import re
 import shutil
 import socket
 import sqlite3
+import tempfile
 import threading
 import time
 from contextlib import contextmanager
 from dataclasses import dataclass
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import Any, Iterable, Iterator
 
 import psutil
 
+try:  # optional: faster JSON parsing (pip install orjson)
+    import orjson
+except ImportError:
+    orjson = None
+
 
 __version__ = "1.0.0"
 
@@ -67,6 +77,7 @@ CSV_HEADER = [
 
 DEFAULT_CONFIG: dict[str, Any] = {
     "debug": False,
+    "log_console": True,              # false = rotating log file only, nothing on stderr
     "thresholds": {
         "cpu_load": 90.0,
         "temperature": 70.0,
@@ -88,10 +99,11 @@ DEFAULT_CONFIG: dict[str, Any] = {
         "auto_migrate_csv": True,     # one-shot import from legacy CSV on first DB use
     },
     "bot": {
-        "poll_timeout": 30,
+        "poll_timeout": 50,
         "session_timeout_seconds": 120,
         "items_per_page": 6,
         "show_processes": 5,
+        "workers": 4,                 # threads handling updates concurrently
     },
 }
 
@@ -175,12 +187,63 @@ def _migrate_v2(conn: sqlite3.Connection) -> None:
 # Env + config
 # ---------------------------------------------------------------------------
 
+def json_loads(data: bytes | str) -> Any:
+    """json.loads, via orjson when installed. Errors are ValueError either way."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON bytes, via orjson when installed."""
+    try:
+        if orjson is not None:
+            return orjson.dumps(obj)
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    except (TypeError, UnicodeEncodeError):
+        # Lone surrogates (psutil's undecodable process names) are not valid
+        # UTF-8; ASCII escaping writes them as \udcxx instead. Anything that
+        # is genuinely unserialisable still raises TypeError here.
+        return json.dumps(obj, separators=(",", ":")).encode("ascii")
+
+
+# Parsed .env / config.json keyed by path, reused while (mtime, size) match.
+# The bot and the CLI call the loaders repeatedly; re-reading an unchanged
+# file is just a stat() then.
+_parsed_files: dict[str, tuple[tuple[int, int], Any]] = {}
+
+
+def _file_sig(path: str) -> tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _cached_parse(path: str) -> tuple[tuple[int, int] | None, Any]:
+    """Return (signature, cached value or None) for path; signature None if missing."""
+    try:
+        sig = _file_sig(path)
+    except FileNotFoundError:
+        _parsed_files.pop(path, None)
+        return None, None
+    hit = _parsed_files.get(path)
+    if hit is not None and hit[0] == sig:
+        return sig, hit[1]
+    return sig, None
+
+
 def load_env(env_file: str = ENV_FILE) -> dict[str, str]:
     """Minimal .env loader (no external dependency)."""
+    sig, cached = _cached_parse(env_file)
+    if sig is None:
+        return {}
+    if cached is not None:
+        return dict(cached)
     out: dict[str, str] = {}
-    if not os.path.exists(env_file):
+    try:
+        f = open(env_file, "r", encoding="utf-8")
+    except FileNotFoundError:
         return out
-    with open(env_file, "r", encoding="utf-8") as f:
+    with f:
         for raw in f:
             line = raw.strip()
             if not line or line.startswith("#") or "=" not in line:
@@ -188,7 +251,8 @@ def load_env(env_file: str = ENV_FILE) -> dict[str, str]:
             key, value = line.split("=", 1)
             value = value.strip().strip('"').strip("'")
             out[key.strip()] = value
-    return out
+    _parsed_files[env_file] = (sig, out)
+    return dict(out)
 
 
 _config_lock = threading.Lock()
@@ -205,47 +269,135 @@ def _deep_merge(base: dict, override: dict) -> dict:
 
 def load_config(path: str = CONFIG_FILE) -> dict[str, Any]:
     """Load config.json, filling missing keys from DEFAULT_CONFIG."""
-    cfg = json.loads(json.dumps(DEFAULT_CONFIG))
-    if os.path.exists(path):
+    sig, cached = _cached_parse(path)
+    if cached is not None:
+        return copy.deepcopy(cached)
+    cfg = copy.deepcopy(DEFAULT_CONFIG)
+    if sig is None:
+        return cfg
+    try:
+        with open(path, "rb") as f:
+            user_cfg = json_loads(f.read())
+        _deep_merge(cfg, user_cfg)
+    except FileNotFoundError:
+        return cfg
+    except (json.JSONDecodeError, OSError) as e:
+        logging.getLogger("sysmon").error("Failed to load %s: %s", path, e)
+        return cfg
+    _parsed_files[path] = (sig, cfg)
+    return copy.deepcopy(cfg)
+
+
+def _read_umask() -> int:
+    # os.umask can only be read by setting it; done once at import, before
+    # any worker threads exist.
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _read_umask()
+
+
+def write_json_atomic(path: str, data: Any, **dump_kwargs: Any) -> None:
+    """Write JSON to a uniquely named temp file next to `path`, then os.replace.
+
+    mkstemp creates the temp file with O_CREAT|O_EXCL, so two processes
+    saving the same file (logger and bot share the state file) can never
+    write into each other's temp file, and no exists() probing is needed.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, **dump_kwargs)
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                user_cfg = json.load(f)
-            _deep_merge(cfg, user_cfg)
-        except (json.JSONDecodeError, OSError) as e:
-            logging.getLogger("sysmon").error("Failed to load %s: %s", path, e)
-    return cfg
+            # mkstemp creates 0600; keep the permissions of the file we replace.
+            shutil.copymode(path, tmp)
+        except OSError:
+            # New file: give it the mode a plain open() would have.
+            os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
 
 
 def save_config(cfg: dict[str, Any], path: str = CONFIG_FILE) -> None:
     """Atomic config save."""
     with _config_lock:
-        tmp = path + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(cfg, f, indent=2, sort_keys=True)
-        os.replace(tmp, path)
+        write_json_atomic(path, cfg, indent=2, sort_keys=True)
+        _parsed_files.pop(path, None)
 
 
 # ---------------------------------------------------------------------------
 # Logging
 # ---------------------------------------------------------------------------
 
-def get_logger(name: str, log_file: str | None = None, level: int = logging.INFO) -> logging.Logger:
-    """Create a logger with rotating file + console handlers exactly once."""
+# Our format only uses time, level, logger name and message. Skip collecting
+# thread/process info and the caller-frame walk (findCaller) on every record.
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logging._srcfile = None
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s | %(message)s"
+
+
+_queue_listeners: list[QueueListener] = []
+
+
+def flush_logging() -> None:
+    """Drain and stop queued-logger listeners. Call before os._exit(),
+    which skips the atexit hook that would otherwise do it."""
+    while _queue_listeners:
+        _queue_listeners.pop().stop()
+
+
+def get_logger(name: str, log_file: str | None = None, level: int = logging.INFO,
+               console: bool = True, queued: bool = False) -> logging.Logger:
+    """Create a logger with rotating file + console handlers exactly once.
+
+    console=False skips the stderr handler, for setups where the journal
+    copy of every record is unwanted next to the rotating file (config
+    "log_console": false). Without a log file the console is always kept.
+
+    queued=True puts a QueueHandler on the logger and moves the real
+    handlers to a QueueListener thread, so callers never wait on disk I/O
+    or the handler locks. Meant for the long-running, multi-threaded bot.
+    """
     logger = logging.getLogger(name)
     if logger.handlers:
         return logger
     logger.setLevel(level)
-    fmt = logging.Formatter("%(asctime)s %(levelname)-7s %(name)s | %(message)s")
+    fmt = logging.Formatter(LOG_FORMAT)
+    handlers: list[logging.Handler] = []
 
     if log_file:
         os.makedirs(os.path.dirname(log_file), exist_ok=True)
         fh = RotatingFileHandler(log_file, maxBytes=2 * 1024 * 1024, backupCount=5)
         fh.setFormatter(fmt)
-        logger.addHandler(fh)
-
-    ch = logging.StreamHandler()
-    ch.setFormatter(fmt)
-    logger.addHandler(ch)
+        handlers.append(fh)
+
+    if console or not log_file:
+        ch = logging.StreamHandler()
+        ch.setFormatter(fmt)
+        handlers.append(ch)
+
+    if queued and handlers:
+        q: queue.SimpleQueue = queue.SimpleQueue()
+        listener = QueueListener(q, *handlers, respect_handler_level=True)
+        listener.start()
+        if not _queue_listeners:
+            atexit.register(flush_logging)  # drain pending records on exit
+        _queue_listeners.append(listener)
+        logger.addHandler(QueueHandler(q))
+    else:
+        for h in handlers:
+            logger.addHandler(h)
     logger.propagate = False
     return logger
 
@@ -255,21 +407,16 @@ def get_logger(name: str, log_file: str | None = None, level: int = logging.INFO
 # ---------------------------------------------------------------------------
 
 def load_state() -> dict[str, Any]:
-    if not os.path.exists(STATE_FILE):
-        return {}
     try:
-        with open(STATE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(STATE_FILE, "rb") as f:
+            return json_loads(f.read())
     except (json.JSONDecodeError, OSError):
         return {}
 
 
 def save_state(state: dict[str, Any]) -> None:
     os.makedirs(STATE_DIR, exist_ok=True)
-    tmp = STATE_FILE + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(state, f)
-    os.replace(tmp, STATE_FILE)
+    write_json_atomic(STATE_FILE, state)
 
 
 # ---------------------------------------------------------------------------
@@ -330,16 +477,61 @@ _THERMAL_CANDIDATES = (
 )
 
 
+# sysfs thermal file kept open between reads; sysfs regenerates the value
+# on every read from offset 0, so the bot only pays for lseek + read.
+_thermal_fd: int | None = None
+_thermal_lock = threading.Lock()
+# Monotonic time until which psutil is skipped after it reported no sensors.
+# Re-probed periodically: hwmon drivers can load after the bot has started.
+_PSUTIL_SENSORS_RETRY = 600  # seconds
+_psutil_sensors_retry_at = 0.0
+
+
+def _read_thermal_fd(fd: int) -> float:
+    os.lseek(fd, 0, os.SEEK_SET)
+    return int(os.read(fd, 16)) / 1000.0
+
+
+def _read_thermal_sysfs() -> float | None:
+    global _thermal_fd
+    with _thermal_lock:
+        if _thermal_fd is not None:
+            try:
+                return _read_thermal_fd(_thermal_fd)
+            except (ValueError, OSError):
+                os.close(_thermal_fd)
+                _thermal_fd = None
+        for path in _THERMAL_CANDIDATES:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                value = _read_thermal_fd(fd)
+            except (ValueError, OSError):
+                os.close(fd)
+                continue
+            _thermal_fd = fd
+            return value
+    return None
+
+
 def read_cpu_temperature() -> float | None:
     """Best-effort CPU temperature read.
 
     Tries psutil sensors first (works on most Linux distros), falls back to
     /sys/class/thermal for Raspberry Pi-style systems.
     """
-    try:
-        sensors = psutil.sensors_temperatures(fahrenheit=False)
-    except (AttributeError, OSError):
-        sensors = {}
+    global _psutil_sensors_retry_at
+    sensors: dict = {}
+    now = time.monotonic()
+    if now >= _psutil_sensors_retry_at:
+        try:
+            sensors = psutil.sensors_temperatures(fahrenheit=False)
+        except (AttributeError, OSError):
+            sensors = {}
+        if not sensors:
+            _psutil_sensors_retry_at = now + _PSUTIL_SENSORS_RETRY
 
     if sensors:
         # Prefer CPU-ish keys
@@ -351,25 +543,58 @@ def read_cpu_temperature() -> float | None:
             if entries:
                 return float(entries[0].current)
 
-    for path in _THERMAL_CANDIDATES:
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                return int(f.read().strip()) / 1000.0
-        except (FileNotFoundError, ValueError, OSError):
-            continue
-    return None
+    return _read_thermal_sysfs()
+
+
+def cpu_times_snapshot() -> dict[str, float]:
+    """Cumulative CPU times (seconds) as a plain dict, safe to keep in the state file."""
+    return dict(psutil.cpu_times()._asdict())
+
 
+def _cpu_total(t: dict[str, float]) -> float:
+    total = sum(t.values())
+    # On Linux guest time is already counted in user/nice (same as psutil).
+    return total - t.get("guest", 0.0) - t.get("guest_nice", 0.0)
 
-def collect_metrics(power_model: dict[str, float], blocking: bool = False) -> Metrics:
+
+def cpu_usage_between(prev: dict[str, float],
+                      cur: dict[str, float]) -> tuple[float, dict[str, float]] | None:
+    """CPU busy % and per-field % between two cpu_times_snapshot() results.
+
+    Same arithmetic as psutil.cpu_percent / cpu_times_percent, but the
+    "previous sample" can come from another process (the previous cron run)
+    instead of a sleep. Returns None if the counters went backwards (reboot)
+    or no time elapsed.
+    """
+    total = _cpu_total(cur) - _cpu_total(prev)
+    if total <= 0:
+        return None
+    fields: dict[str, float] = {}
+    for key, value in cur.items():
+        delta = value - prev.get(key, 0.0)
+        if delta < 0:
+            return None
+        fields[key] = min(100.0, 100.0 * delta / total)
+    idle = fields.get("idle", 0.0) + fields.get("iowait", 0.0)
+    return max(0.0, min(100.0, 100.0 - idle)), fields
+
+
+def collect_metrics(power_model: dict[str, float], blocking: bool = False,
+                    cpu_usage: tuple[float, dict[str, float]] | None = None) -> Metrics:
     """Snapshot system metrics.
 
     blocking=False uses psutil's stateful cpu_percent (interval=None) which
-    returns the percent since the last call. The cron path calls it once on
-    startup with a short interval to seed the counter.
+    returns the percent since the last call; blocking=True samples over a
+    short sleep instead. Callers that already know the CPU usage since their
+    previous sample (see cpu_usage_between) pass it as `cpu_usage` and skip
+    psutil's sampling entirely.
     """
-    interval = 0.5 if blocking else None
-    cpu_load = psutil.cpu_percent(interval=interval)
-    cpu_times = psutil.cpu_times_percent(interval=None)
+    if cpu_usage is not None:
+        cpu_load, cpu_fields = cpu_usage
+    else:
+        interval = 0.5 if blocking else None
+        cpu_load = psutil.cpu_percent(interval=interval)
+        cpu_fields = psutil.cpu_times_percent(interval=None)._asdict()
     temperature = read_cpu_temperature()
 
     vm = psutil.virtual_memory()
@@ -425,10 +650,10 @@ def collect_metrics(power_model: dict[str, float], blocking: bool = False) -> Me
         load_avg_1m=load1,
         power_estimation=power_estimation,
         uptime_seconds=uptime,
-        cpu_user=getattr(cpu_times, "user", 0.0),
-        cpu_system=getattr(cpu_times, "system", 0.0),
-        cpu_iowait=getattr(cpu_times, "iowait", 0.0),
-        cpu_steal=getattr(cpu_times, "steal", 0.0),
+        cpu_user=cpu_fields.get("user", 0.0),
+        cpu_system=cpu_fields.get("system", 0.0),
+        cpu_iowait=cpu_fields.get("iowait", 0.0),
+        cpu_steal=cpu_fields.get("steal", 0.0),
         load_avg_5m=load5,
         load_avg_15m=load15,
         mem_available_mb=vm.available / (1024 * 1024),
@@ -580,8 +805,20 @@ systemd_status = service_status
 
 
 def system_info() -> dict[str, Any]:
+    """Host facts for the status views.
+
+    Everything except the hostname is fixed for the life of the process, so
+    the file reads behind it (/proc/cpuinfo, /etc/os-release) happen once
+    instead of on every status render / dashboard refresh in the bot.
+    """
+    info = dict(_static_system_info())
+    info["hostname"] = socket.gethostname()
+    return info
+
+
+@functools.lru_cache(maxsize=1)
+def _static_system_info() -> dict[str, Any]:
     info: dict[str, Any] = {
-        "hostname": socket.gethostname(),
         "boot_time": psutil.boot_time(),
         "cpu_count_logical": psutil.cpu_count(logical=True),
         "cpu_count_physical": psutil.cpu_count(logical=False) or 0,
@@ -701,26 +938,41 @@ def db_init(auto_migrate: bool = True) -> None:
             conn.execute(
                 "INSERT OR IGNORE INTO schema_meta(key, value) VALUES('migrated_from_csv', '0')"
             )
-            migrated = conn.execute(
-                "SELECT value FROM schema_meta WHERE key='migrated_from_csv'"
-            ).fetchone()
         _db_initialized = True
 
-        if auto_migrate and migrated and migrated["value"] == "0":
-            try:
-                imported = migrate_csv_to_db()
-                if imported:
-                    logging.getLogger("sysmon").info(
-                        "Imported %d rows from legacy CSV archives", imported,
-                    )
-            except Exception:
-                logging.getLogger("sysmon").exception("CSV migration failed")
-            finally:
-                with db_connect() as conn:
-                    conn.execute(
-                        "UPDATE schema_meta SET value=? WHERE key='migrated_from_csv'",
-                        (dt.datetime.now().isoformat(),),
-                    )
+        if auto_migrate:
+            db_import_legacy_csv_if_pending()
+
+
+def db_import_legacy_csv_if_pending() -> int:
+    """Run the one-shot legacy CSV import unless it has already happened.
+
+    Split out of db_init() so the logger can take its sample first and do
+    the (possibly large) import afterwards. Returns rows imported.
+    """
+    db_ensure()
+    with db_connect(readonly=True) as conn:
+        migrated = conn.execute(
+            "SELECT value FROM schema_meta WHERE key='migrated_from_csv'"
+        ).fetchone()
+    if not migrated or migrated["value"] != "0":
+        return 0
+    imported = 0
+    try:
+        imported = migrate_csv_to_db()
+        if imported:
+            logging.getLogger("sysmon").info(
+                "Imported %d rows from legacy CSV archives", imported,
+            )
+    except Exception:
+        logging.getLogger("sysmon").exception("CSV migration failed")
+    finally:
+        with db_connect() as conn:
+            conn.execute(
+                "UPDATE schema_meta SET value=? WHERE key='migrated_from_csv'",
+                (dt.datetime.now().isoformat(),),
+            )
+    return imported
 
 
 def db_ensure() -> None:
@@ -729,10 +981,21 @@ def db_ensure() -> None:
         db_init()
 
 
-def db_insert_metric(m: "Metrics", interval_wh: float) -> None:
+@contextmanager
+def _db_conn_or_new(conn: sqlite3.Connection | None) -> Iterator[sqlite3.Connection]:
+    """Yield `conn` if the caller already holds one, else open a fresh connection."""
+    if conn is not None:
+        yield conn
+        return
+    with db_connect() as own:
+        yield own
+
+
+def db_insert_metric(m: "Metrics", interval_wh: float,
+                     conn: sqlite3.Connection | None = None) -> None:
     db_ensure()
     ts = int(m.timestamp.timestamp())
-    with db_connect() as conn:
+    with _db_conn_or_new(conn) as conn:
         conn.execute(
             """
             INSERT OR REPLACE INTO metrics (
@@ -762,9 +1025,10 @@ def db_insert_metric(m: "Metrics", interval_wh: float) -> None:
         )
 
 
-def db_insert_alert(metric: str, event: str, value: float, threshold: float | None) -> None:
+def db_insert_alert(metric: str, event: str, value: float, threshold: float | None,
+                    conn: sqlite3.Connection | None = None) -> None:
     db_ensure()
-    with db_connect() as conn:
+    with _db_conn_or_new(conn) as conn:
         conn.execute(
             "INSERT INTO alert_events (ts, metric, event, value, threshold) VALUES (?, ?, ?, ?, ?)",
             (int(time.time()), metric, event, value, threshold),
@@ -815,22 +1079,65 @@ def db_summarize_window(since_ts: int, until_ts: int | None = None) -> dict[str,
     return dict(row) if row else {"n": 0}
 
 
-def db_available_dates() -> list[str]:
-    """Distinct local-date strings ('YYYY-MM-DD') that have any data."""
+def _local_midnight_ts(day: dt.date) -> int:
+    return int(dt.datetime.combine(day, dt.time()).timestamp())
+
+
+def db_available_dates(since: str | None = None) -> list[str]:
+    """Distinct local-date strings ('YYYY-MM-DD') that have any data, newest first.
+
+    Skip-scan on the ts primary key: find the first sample at or after a
+    cursor, record its local date, jump the cursor to the next local
+    midnight. One B-tree seek per day with data instead of computing
+    date() for every row. `since` ('YYYY-MM-DD') limits the scan to that
+    day and later, for incremental refreshes.
+    """
     db_ensure()
+    dates: list[str] = []
+    cursor = _local_midnight_ts(dt.date.fromisoformat(since)) if since else None
     with db_connect(readonly=True) as conn:
-        rows = conn.execute(
-            "SELECT DISTINCT date(ts, 'unixepoch', 'localtime') AS d "
-            "FROM metrics ORDER BY d DESC"
-        ).fetchall()
-    return [r["d"] for r in rows]
+        while True:
+            if cursor is None:
+                row = conn.execute("SELECT MIN(ts) FROM metrics").fetchone()
+            else:
+                row = conn.execute("SELECT MIN(ts) FROM metrics WHERE ts >= ?", (cursor,)).fetchone()
+            if row is None or row[0] is None:
+                break
+            day = dt.date.fromtimestamp(row[0])
+            dates.append(day.isoformat())
+            cursor = _local_midnight_ts(day + dt.timedelta(days=1))
+    dates.reverse()
+    return dates
+
+
+def db_first_date() -> str | None:
+    """Local date of the oldest sample, or None if the table is empty."""
+    db_ensure()
+    with db_connect(readonly=True) as conn:
+        row = conn.execute("SELECT MIN(ts) FROM metrics").fetchone()
+    if row is None or row[0] is None:
+        return None
+    return dt.date.fromtimestamp(row[0]).isoformat()
+
+
+_EXPORT_CSV_HEADER = ",".join((
+    "Timestamp", "CPU Load (%)", "Temperature (C)", "RAM Usage (%)",
+    "Disk Usage (%)", "Net Sent Total (MB)", "Net Recv Total (MB)",
+    "Net Sent Delta (MB)", "Net Recv Delta (MB)",
+    "Load Avg 1m", "Estimated Power (W)", "Interval Wh",
+    "CPU User (%)", "CPU System (%)", "CPU IOWait (%)", "CPU Steal (%)",
+    "Load Avg 5m", "Load Avg 15m",
+    "Mem Available (MB)", "Mem Cached (MB)", "Mem Buffers (MB)", "Swap Used (MB)",
+    "Disk Read (MB/s)", "Disk Write (MB/s)",
+    "Processes Total", "Processes Running", "Open FDs",
+))
 
 
 def db_export_csv_for_date(date_iso: str) -> str | None:
     """Export rows for a local-date as a CSV string. Returns None if empty."""
     db_ensure()
     try:
-        day = dt.datetime.strptime(date_iso, "%Y-%m-%d").date()
+        day = dt.date.fromisoformat(date_iso)
     except ValueError:
         return None
     start = int(dt.datetime.combine(day, dt.time.min).timestamp())
@@ -842,28 +1149,17 @@ def db_export_csv_for_date(date_iso: str) -> str | None:
         ).fetchall()
     if not rows:
         return None
-    import io
-    buf = io.StringIO()
-    writer = csv.writer(buf)
-    header = [
-        "Timestamp", "CPU Load (%)", "Temperature (C)", "RAM Usage (%)",
-        "Disk Usage (%)", "Net Sent Total (MB)", "Net Recv Total (MB)",
-        "Net Sent Delta (MB)", "Net Recv Delta (MB)",
-        "Load Avg 1m", "Estimated Power (W)", "Interval Wh",
-        "CPU User (%)", "CPU System (%)", "CPU IOWait (%)", "CPU Steal (%)",
-        "Load Avg 5m", "Load Avg 15m",
-        "Mem Available (MB)", "Mem Cached (MB)", "Mem Buffers (MB)", "Swap Used (MB)",
-        "Disk Read (MB/s)", "Disk Write (MB/s)",
-        "Processes Total", "Processes Running", "Open FDs",
-    ]
-    writer.writerow(header)
 
     def f(v, fmt=".2f", default="N/A"):
         return default if v is None else format(v, fmt)
 
+    # Every field is a formatted number, "N/A" or a timestamp — nothing that
+    # needs CSV quoting — so rows are joined directly instead of going
+    # through csv.writer's per-field escaping. CRLF matches csv.writer.
+    lines = [_EXPORT_CSV_HEADER]
     for r in rows:
         ts_str = dt.datetime.fromtimestamp(r["ts"]).strftime("%Y-%m-%d %H:%M:%S")
-        writer.writerow([
+        lines.append(",".join((
             ts_str,
             f(r["cpu_load"]),
             f(r["temperature"]),
@@ -891,8 +1187,9 @@ def db_export_csv_for_date(date_iso: str) -> str | None:
             f(r["procs_total"], "d"),
             f(r["procs_running"], "d"),
             f(r["open_fds"], "d"),
-        ])
-    return buf.getvalue()
+        )))
+    lines.append("")
+    return "\r\n".join(lines)
 
 
 def db_purge_older_than(days: int) -> int:
@@ -933,14 +1230,13 @@ def migrate_csv_to_db() -> int:
     Returns the count of rows inserted.
     """
     db_ensure()
-    candidates: list[str] = []
-    if os.path.exists(LOG_FILE_CSV):
-        candidates.append(LOG_FILE_CSV)
-    if os.path.isdir(ARCHIVE_DIR):
-        for root, _dirs, files in os.walk(ARCHIVE_DIR):
-            for name in files:
-                if name.endswith(".csv"):
-                    candidates.append(os.path.join(root, name))
+    # Missing files are skipped by the OSError handler below and os.walk
+    # yields nothing for a missing directory, so no exists/isdir probes.
+    candidates: list[str] = [LOG_FILE_CSV]
+    for root, _dirs, files in os.walk(ARCHIVE_DIR):
+        for name in files:
+            if name.endswith(".csv"):
+                candidates.append(os.path.join(root, name))
 
     inserted = 0
     sql = """
@@ -951,6 +1247,16 @@ def migrate_csv_to_db() -> int:
             load_avg_1m, power_w, interval_wh
         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """
+
+    def num(row: dict[str, str], key: str) -> float | None:
+        v = row.get(key)
+        if v in (None, "", "N/A"):
+            return None
+        try:
+            return float(v)
+        except ValueError:
+            return None
+
     with db_connect() as conn:
         for path in candidates:
             try:
@@ -962,30 +1268,23 @@ def migrate_csv_to_db() -> int:
                         if not ts_str:
                             continue
                         try:
-                            ts = int(dt.datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S").timestamp())
+                            # fromisoformat is C-level; strptime re-parses its format per call.
+                            ts = int(dt.datetime.fromisoformat(ts_str).timestamp())
                         except ValueError:
                             continue
-                        def num(key: str) -> float | None:
-                            v = row.get(key)
-                            if v in (None, "", "N/A"):
-                                return None
-                            try:
-                                return float(v)
-                            except ValueError:
-                                return None
                         batch.append((
                             ts,
-                            num("CPU Load (%)") or 0.0,
-                            num("Temperature (C)") if "Temperature (C)" in row else num("Temperature (°C)"),
-                            num("RAM Usage (%)") or 0.0,
-                            num("Disk Usage (%)") or 0.0,
-                            num("Net Sent Total (MB)") if "Net Sent Total (MB)" in row else num("Network Sent (MB)"),
-                            num("Net Recv Total (MB)") if "Net Recv Total (MB)" in row else num("Network Received (MB)"),
-                            num("Net Sent Delta (MB)"),
-                            num("Net Recv Delta (MB)"),
-                            num("Load Avg 1m"),
-                            num("Estimated Power (W)") or 0.0,
-                            num("Interval Wh") or 0.0,
+                            num(row, "CPU Load (%)") or 0.0,
+                            num(row, "Temperature (C)") if "Temperature (C)" in row else num(row, "Temperature (°C)"),
+                            num(row, "RAM Usage (%)") or 0.0,
+                            num(row, "Disk Usage (%)") or 0.0,
+                            num(row, "Net Sent Total (MB)") if "Net Sent Total (MB)" in row else num(row, "Network Sent (MB)"),
+                            num(row, "Net Recv Total (MB)") if "Net Recv Total (MB)" in row else num(row, "Network Received (MB)"),
+                            num(row, "Net Sent Delta (MB)"),
+                            num(row, "Net Recv Delta (MB)"),
+                            num(row, "Load Avg 1m"),
+                            num(row, "Estimated Power (W)") or 0.0,
+                            num(row, "Interval Wh") or 0.0,
                         ))
                     if batch:
                         cur = conn.executemany(sql, batch)
@@ -999,46 +1298,60 @@ def migrate_csv_to_db() -> int:
 # CSV helpers (legacy / migration only)
 # ---------------------------------------------------------------------------
 
+def _tail_lines(f: Any, n: int, block_size: int = 4096) -> list[bytes]:
+    """Last n raw lines of an open binary file, reading backwards from EOF."""
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    buf = b""
+    lines: list[bytes] = []
+    while size > 0 and len(lines) <= n:
+        read_size = min(block_size, size)
+        size -= read_size
+        f.seek(size)
+        buf = f.read(read_size) + buf
+        lines = buf.splitlines()
+    return lines[-n:]
+
+
 def _read_last_lines(path: str, n: int = 1, block_size: int = 4096) -> list[str]:
     """Read last n non-empty lines from a file efficiently (reverse seek)."""
-    if not os.path.exists(path):
+    try:
+        with open(path, "rb") as f:
+            lines = _tail_lines(f, n, block_size)
+    except FileNotFoundError:
         return []
-    with open(path, "rb") as f:
-        f.seek(0, os.SEEK_END)
-        size = f.tell()
-        buf = b""
-        lines: list[str] = []
-        while size > 0 and len(lines) <= n:
-            read_size = min(block_size, size)
-            size -= read_size
-            f.seek(size)
-            buf = f.read(read_size) + buf
-            lines = buf.splitlines()
-        return [ln.decode("utf-8", errors="replace") for ln in lines[-n:] if ln.strip()]
+    return [ln.decode("utf-8", errors="replace") for ln in lines if ln.strip()]
 
 
 def read_csv_tail(path: str = LOG_FILE_CSV, n: int = 60) -> list[dict[str, str]]:
-    """Read last n rows of the metrics CSV without loading the whole file."""
-    if not os.path.exists(path):
-        return []
-    with open(path, "r", encoding="utf-8") as f:
-        header_line = f.readline().rstrip("\n")
-    if not header_line:
+    """Read last n rows of the metrics CSV without loading the whole file.
+
+    Header and tail come from the same handle: one open, and only the last
+    few KB of the file are ever read regardless of its size.
+    """
+    try:
+        with open(path, "rb") as f:
+            header_line = f.readline().rstrip(b"\r\n")
+            if not header_line:
+                return []
+            tail = _tail_lines(f, n + 1)
+    except FileNotFoundError:
         return []
-    header = next(csv.reader([header_line]))
-    tail = _read_last_lines(path, n + 1)
     # Drop header line if it appears at start
-    if tail and tail[0] == header_line:
+    if tail and tail[0].rstrip(b"\r") == header_line:
         tail = tail[1:]
+    header = next(csv.reader([header_line.decode("utf-8", errors="replace")]))
     rows: list[dict[str, str]] = []
     for raw in tail:
+        if not raw.strip():
+            continue
         try:
-            cells = next(csv.reader([raw]))
+            cells = next(csv.reader([raw.decode("utf-8", errors="replace")]))
             if len(cells) == len(header):
                 rows.append(dict(zip(header, cells)))
         except StopIteration:
             continue
-    return rows
+    return rows[-n:]
 
 
 def get_last_csv_entry(path: str = LOG_FILE_CSV) -> dict[str, str] | None:
@@ -6,25 +6,37 @@ Goals:
   - Live system insight (CPU, RAM, disk, temp, network, top procs, services)
   - Historical browsing of archived CSV logs
   - Runtime control: alerts on/off, threshold tuning
-  - Light footprint: long polling, connection reuse, no extra threads
+  - Light footprint: long polling, connection reuse, a small worker pool
 """
 
 from __future__ import annotations
 
+import calendar
 import datetime as dt
+import functools
+import gzip
+import hashlib
 import io
+import json
 import math
+import operator
 import os
+import random
 import re
 import shutil
 import signal
 import sys
+import threading
 import time
-from datetime import datetime, timedelta
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable
 
 import psutil
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import sysmon_lib as sm
 
@@ -38,10 +50,25 @@ CONFIG = sm.load_config()
 
 BOT_TOKEN = ENV.get("BOT_TOKEN") or ""
 CHAT_ID_DEFAULT = ENV.get("CHAT_ID") or ""
-AUTHORIZED_USERS = {u.strip() for u in (ENV.get("AUTHORIZED_USERS") or "").split(",") if u.strip()}
+
+
+def _parse_ids(raw: str) -> frozenset[int]:
+    """Comma-separated Telegram IDs -> ints. Non-numeric entries could never match; drop them."""
+    ids: set[int] = set()
+    for part in raw.split(","):
+        try:
+            ids.add(int(part))
+        except ValueError:
+            continue
+    return frozenset(ids)
+
+
+# Ints, matching the `from.id` Telegram sends, so the per-update check is a
+# plain hashed lookup with no str() conversion.
+AUTHORIZED_USERS = _parse_ids(ENV.get("AUTHORIZED_USERS") or "")
 # Allow CHAT_ID to receive messages too if AUTHORIZED_USERS is empty
 if not AUTHORIZED_USERS and CHAT_ID_DEFAULT:
-    AUTHORIZED_USERS.add(CHAT_ID_DEFAULT)
+    AUTHORIZED_USERS = _parse_ids(CHAT_ID_DEFAULT)
 
 if not BOT_TOKEN:
     raise SystemExit("BOT_TOKEN missing from .env")
@@ -49,35 +76,161 @@ if not BOT_TOKEN:
 API_URL = f"https://api.telegram.org/bot{BOT_TOKEN}"
 
 LOG_FILE = os.path.join(sm.BOT_LOGS_DIR, "telegram_bot.log")
-logger = sm.get_logger("bot", LOG_FILE)
+logger = sm.get_logger("bot", LOG_FILE, console=bool(CONFIG.get("log_console", True)),
+                       queued=True)
 
 SESSION = requests.Session()
 SESSION.headers.update({"Connection": "keep-alive"})
 
+# getUpdates takes allowed_updates as a JSON array. Passing a Python list in
+# params would be sent as repeated query keys, which Telegram does not
+# read, so every update type would still be delivered.
+ALLOWED_UPDATES = json.dumps(["message", "callback_query"])
+
+_EMPTY_RESULT = b'"result":[]}'
+
+# (connect, read) timeouts. getUpdates adds its long-poll time to the read part.
+CONNECT_TIMEOUT = 5
+API_TIMEOUT = (CONNECT_TIMEOUT, 15)
+UPLOAD_TIMEOUT = (CONNECT_TIMEOUT, 30)
+
 BOT_CFG = CONFIG.get("bot", {})
-POLL_TIMEOUT = int(BOT_CFG.get("poll_timeout", 30))
+# getUpdates long-poll seconds. 0 would turn it into a busy short poll and
+# Telegram caps the wait at 50, so clamp whatever config.json says.
+POLL_TIMEOUT = min(max(int(BOT_CFG.get("poll_timeout", 50)), 1), 50)
 SESSION_TIMEOUT = int(BOT_CFG.get("session_timeout_seconds", 120))
 ITEMS_PER_PAGE = int(BOT_CFG.get("items_per_page", 6))
 SHOW_PROCS = int(BOT_CFG.get("show_processes", 5))
+BOT_WORKERS = max(1, int(BOT_CFG.get("workers", 4)))
+ACK_WORKERS = 2  # answerCallbackQuery only; see handle_callback
+
+# Every Telegram call goes to one host, so one pool with a warm TLS socket
+# per concurrent caller: each worker and ack thread plus the getUpdates long-poll.
+# Smaller and urllib3 would open and then discard extra sockets under load.
+# Only failed *connects* are retried at this layer: the request never left,
+# so even sendMessage cannot be duplicated. 429s are handled in _post and
+# poll_loop, where the retry_after hint is available.
+_CONNECT_RETRY = Retry(total=3, connect=3, read=0, status=0, other=0,
+                       backoff_factor=0.5, allowed_methods=None)
+SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=BOT_WORKERS + ACK_WORKERS + 1,
+                                      pool_block=False, max_retries=_CONNECT_RETRY))
 
 
 # ---------------------------------------------------------------------------
 # Telegram API helpers
 # ---------------------------------------------------------------------------
 
-def _post(method: str, payload: dict, files: dict | None = None) -> dict | None:
+class _MultipartBody:
+    """Streaming multipart/form-data body for uploads.
+
+    requests' files= encoder reads every file fully into memory to build the
+    body; this one hands http.client the form fields, then the file object
+    itself, chunk by chunk. __len__ lets requests send a Content-Length.
+    files maps field -> file object or (filename, file object, content type).
+    """
+
+    def __init__(self, fields: dict, files: dict) -> None:
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self._parts: list[Any] = []
+        self._len = 0
+        head = "".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'
+            for k, v in fields.items()
+        )
+        for name, spec in files.items():
+            if isinstance(spec, tuple):
+                filename, fileobj, ctype = spec
+            else:
+                fileobj = spec
+                filename, ctype = os.path.basename(getattr(spec, "name", name)), "application/octet-stream"
+            filename = str(filename).replace('"', "")
+            head += (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f"Content-Type: {ctype}\r\n\r\n"
+            )
+            self._add(io.BytesIO(head.encode("utf-8")))
+            self._add(fileobj)
+            head = "\r\n"
+        self._add(io.BytesIO(f"{head}--{boundary}--\r\n".encode("utf-8")))
+
+    def _add(self, f: Any) -> None:
+        pos = f.tell()
+        try:
+            size = os.fstat(f.fileno()).st_size
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            size = f.seek(0, os.SEEK_END)
+            f.seek(pos)
+        self._len += size - pos
+        self._parts.append(f)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def read(self, size: int = -1) -> bytes:
+        out = b""
+        while self._parts and (size < 0 or len(out) < size):
+            chunk = self._parts[0].read(-1 if size < 0 else size - len(out))
+            if chunk:
+                out += chunk
+            else:
+                self._parts.pop(0)
+        return out
+
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+_MAX_RETRY_AFTER = 30  # seconds; longer flood waits are not worth blocking a worker
+
+
+def _retry_after(r: requests.Response) -> float | None:
+    """Seconds Telegram asks us to wait on a 429, or None if it did not say."""
+    try:
+        return float(sm.json_loads(r.content)["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _jitter() -> float:
+    return random.uniform(0, 0.5)
+
+
+def _call(method: str, payload: dict, files: dict | None = None) -> tuple[int | None, dict | None]:
+    """POST a Bot API method; returns (HTTP status or None, parsed reply or None)."""
     try:
         if files:
-            r = SESSION.post(f"{API_URL}/{method}", data=payload, files=files, timeout=30)
+            body = _MultipartBody(payload, files)
+            r = SESSION.post(f"{API_URL}/{method}", data=body,
+                             headers={"Content-Type": body.content_type}, timeout=UPLOAD_TIMEOUT)
         else:
-            r = SESSION.post(f"{API_URL}/{method}", json=payload, timeout=15)
+            data = sm.json_dumps(payload)
+            r = SESSION.post(f"{API_URL}/{method}", data=data,
+                             headers=_JSON_HEADERS, timeout=API_TIMEOUT)
+            if r.status_code == 429:
+                # Rate limited: honour the server's hint once. Uploads are not
+                # retried since their body stream has already been consumed.
+                wait = _retry_after(r)
+                if wait is not None and wait <= _MAX_RETRY_AFTER:
+                    logger.warning("API %s rate limited; retrying in %.0fs", method, wait)
+                    time.sleep(wait + _jitter())
+                    r = SESSION.post(f"{API_URL}/{method}", data=data,
+                                     headers=_JSON_HEADERS, timeout=API_TIMEOUT)
         if r.status_code != 200:
             logger.warning("API %s -> %s %s", method, r.status_code, r.text[:200])
-            return None
-        return r.json()
+            return r.status_code, None
+        return r.status_code, sm.json_loads(r.content)
     except requests.RequestException as e:
         logger.warning("API %s network error: %s", method, e)
-        return None
+        return None, None
+    except ValueError as e:
+        # 200 with a non-JSON body (captive portal, proxy error page).
+        logger.warning("API %s returned malformed JSON: %s", method, e)
+        return None, None
+
+
+def _post(method: str, payload: dict, files: dict | None = None) -> dict | None:
+    return _call(method, payload, files)[1]
 
 
 def send_message(chat_id: int | str, text: str, reply_markup: dict | None = None,
@@ -112,15 +265,14 @@ def answer_callback(callback_id: str, text: str | None = None, alert: bool = Fal
 
 
 def send_document(chat_id: int | str, file_path: str, caption: str | None = None) -> None:
-    if not os.path.exists(file_path):
-        send_message(chat_id, f"_File not found:_ `{os.path.basename(file_path)}`")
-        return
     try:
         with open(file_path, "rb") as f:
             payload = {"chat_id": chat_id}
             if caption:
                 payload["caption"] = caption
             _post("sendDocument", payload, files={"document": f})
+    except FileNotFoundError:
+        send_message(chat_id, f"_File not found:_ `{os.path.basename(file_path)}`")
     except OSError as e:
         logger.error("send_document failed: %s", e)
         send_message(chat_id, f"_Failed to send file: {e}_")
@@ -134,20 +286,19 @@ _UNAUTHORIZED_LOG_MAX = 1000      # cap the dict
 _unauthorized_log: dict[int, float] = {}
 
 
-def is_authorized(user_id: int | str, from_obj: dict | None = None) -> bool:
+def is_authorized(user_id: int, from_obj: dict | None = None) -> bool:
     """Whitelist check with rate-limited logging for misses."""
-    if str(user_id) in AUTHORIZED_USERS:
+    if user_id in AUTHORIZED_USERS:
         return True
 
     now = time.time()
-    uid_int = int(user_id) if str(user_id).lstrip("-").isdigit() else 0
-    last = _unauthorized_log.get(uid_int, 0)
+    last = _unauthorized_log.get(user_id, 0)
     if now - last >= _UNAUTHORIZED_LOG_COOLDOWN:
         username = (from_obj or {}).get("username")
         first = (from_obj or {}).get("first_name")
         ident = f"@{username}" if username else (first or "?")
         logger.warning("Unauthorized Telegram access user_id=%s (%s)", user_id, ident)
-        _unauthorized_log[uid_int] = now
+        _unauthorized_log[user_id] = now
 
         # Opportunistic trim so the dict can't grow forever.
         if len(_unauthorized_log) > _UNAUTHORIZED_LOG_MAX:
@@ -175,13 +326,18 @@ def code_block(text: str, lang: str = "") -> str:
 # ---------------------------------------------------------------------------
 
 class Session:
+    __slots__ = ("stage", "year", "month", "page", "proc_sort", "day_items", "last_active")
+
     def __init__(self) -> None:
         self.stage: str | None = None
         self.year: str | None = None
         self.month: str | None = None
         self.page: int = 0
         self.proc_sort: str = "cpu"
-        self.last_active: datetime = datetime.now()
+        # Day buttons for the selected month, built once when the month is
+        # picked and reused by pagination / back navigation.
+        self.day_items: list[dict] | None = None
+        self.last_active: float = time.monotonic()
 
 
 SESSIONS: dict[int, Session] = {}
@@ -189,14 +345,30 @@ SESSIONS: dict[int, Session] = {}
 
 def get_session(chat_id: int) -> Session:
     sess = SESSIONS.get(chat_id)
-    now = datetime.now()
-    if sess is None or (now - sess.last_active) > timedelta(seconds=SESSION_TIMEOUT):
+    now = time.monotonic()
+    if sess is None or now - sess.last_active > SESSION_TIMEOUT:
         sess = Session()
         SESSIONS[chat_id] = sess
     sess.last_active = now
     return sess
 
 
+_SESSION_SWEEP_INTERVAL = 60  # seconds
+_last_session_sweep = 0.0
+
+
+def _sweep_sessions() -> None:
+    """Drop sessions idle past SESSION_TIMEOUT (they would be reset on next use anyway)."""
+    global _last_session_sweep
+    now = time.monotonic()
+    if now - _last_session_sweep < _SESSION_SWEEP_INTERVAL:
+        return
+    _last_session_sweep = now
+    for chat_id, sess in list(SESSIONS.items()):
+        if now - sess.last_active > SESSION_TIMEOUT:
+            SESSIONS.pop(chat_id, None)
+
+
 # ---------------------------------------------------------------------------
 # Status views
 # ---------------------------------------------------------------------------
@@ -212,6 +384,29 @@ def _emoji_for(metric: str, value: float) -> str:
     return sm.status_emoji(value, warn, danger)
 
 
+# Static keyboards are built once and shared; treat them as read-only.
+_STATUS_KB = {
+    "inline_keyboard": [
+        [
+            {"text": "🔄 Refresh", "callback_data": "view:status"},
+            {"text": "📊 Detail", "callback_data": "view:detail"},
+        ],
+        [
+            {"text": "🧠 Top Procs", "callback_data": "view:top"},
+            {"text": "💾 Disks", "callback_data": "view:disks"},
+        ],
+        [
+            {"text": "🌐 Network", "callback_data": "view:net"},
+            {"text": "📈 24h Summary", "callback_data": "view:summary24"},
+        ],
+        [
+            {"text": "📁 Logs", "callback_data": "view:logs"},
+            {"text": "⚙️ Settings", "callback_data": "view:settings"},
+        ],
+    ]
+}
+
+
 def render_status_compact() -> tuple[str, dict]:
     """One-screen summary of current system state with hour-long sparklines.
 
@@ -278,27 +473,7 @@ def render_status_compact() -> tuple[str, dict]:
         + body
     )
 
-    keyboard = {
-        "inline_keyboard": [
-            [
-                {"text": "🔄 Refresh", "callback_data": "view:status"},
-                {"text": "📊 Detail", "callback_data": "view:detail"},
-            ],
-            [
-                {"text": "🧠 Top Procs", "callback_data": "view:top"},
-                {"text": "💾 Disks", "callback_data": "view:disks"},
-            ],
-            [
-                {"text": "🌐 Network", "callback_data": "view:net"},
-                {"text": "📈 24h Summary", "callback_data": "view:summary24"},
-            ],
-            [
-                {"text": "📁 Logs", "callback_data": "view:logs"},
-                {"text": "⚙️ Settings", "callback_data": "view:settings"},
-            ],
-        ]
-    }
-    return text, keyboard
+    return text, _STATUS_KB
 
 
 def render_detail() -> str:
@@ -306,7 +481,7 @@ def render_detail() -> str:
     info = sm.system_info()
     vm = psutil.virtual_memory()
     swap = psutil.swap_memory()
-    boot = datetime.fromtimestamp(info["boot_time"]).strftime("%Y-%m-%d %H:%M")
+    boot = dt.datetime.fromtimestamp(info["boot_time"]).strftime("%Y-%m-%d %H:%M")
     lines = [
         f"*System detail*",
         f"`Host    `: {info.get('hostname','?')}",
@@ -442,33 +617,77 @@ def render_settings() -> tuple[str, dict]:
 # Archive browser (DB-backed)
 # ---------------------------------------------------------------------------
 
-_MONTH_ABBR = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
-               "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+# "01" -> "Jan" etc., keyed the way month numbers come out of the date index.
+_MONTH_LABELS = {f"{i:02d}": calendar.month_abbr[i] for i in range(1, 13)}
+
 
+# db_available_dates() does one index seek per day of history, and the archive
+# browser asks for it on every button press. New dates appear at most once a day, so
+# a short-lived in-process snapshot is plenty fresh. When it expires only the
+# newest known day onwards is rescanned, and days dropped by retention are
+# trimmed from the old end; /getlog forces a full rebuild.
+_DATES_CACHE_TTL = 300  # seconds
+_dates_cache: tuple[float, dict[str, dict[str, dict[str, str]]]] | None = None
 
-def _dates_grouped() -> dict[str, dict[str, list[str]]]:
-    """{year: {month_num: [day, ...]}}, sorted descending by year/month, ascending by day."""
-    grouped: dict[str, dict[str, list[str]]] = {}
-    for date_iso in sm.db_available_dates():
+
+def _dates_grouped() -> dict[str, dict[str, dict[str, str]]]:
+    """{year: {month_num: {day: weekday_abbr}}}, years descending, months/days ascending.
+
+    Served from a TTL cache; everything is sorted and the weekday labels are
+    computed once per date so callers can hand the values out as-is.
+    """
+    global _dates_cache
+    now = time.monotonic()
+    if _dates_cache is not None and now - _dates_cache[0] < _DATES_CACHE_TTL:
+        return _dates_cache[1]
+
+    raw: dict[str, dict[str, dict[str, str]]] = {}
+    since = None
+    if _dates_cache is not None:
+        old = _dates_cache[1]
+        first = sm.db_first_date() or "9999-99-99"
+        for y, months in old.items():
+            for m, days in months.items():
+                kept = {d: wd for d, wd in days.items() if f"{y}-{m}-{d}" >= first}
+                if kept:
+                    raw.setdefault(y, {})[m] = kept
+        if raw:
+            y = max(raw)
+            m = max(raw[y])
+            since = f"{y}-{m}-{max(raw[y][m])}"
+
+    for date_iso in sm.db_available_dates(since=since):
         try:
-            y, m, d = date_iso.split("-")
+            weekday = dt.date.fromisoformat(date_iso).strftime("%a")
         except ValueError:
             continue
-        grouped.setdefault(y, {}).setdefault(m, []).append(d)
+        y, m, d = date_iso.split("-")
+        raw.setdefault(y, {}).setdefault(m, {})[d] = weekday
+    grouped = {
+        y: {m: dict(sorted(raw[y][m].items())) for m in sorted(raw[y])}
+        for y in sorted(raw, reverse=True)
+    }
+    _dates_cache = (now, grouped)
     return grouped
 
 
+def invalidate_dates_cache() -> None:
+    """Drop the snapshot so the next lookup re-reads the DB (used by /getlog)."""
+    global _dates_cache
+    _dates_cache = None
+
+
 def get_available_years() -> list[str]:
-    return sorted(_dates_grouped().keys(), reverse=True)
+    return list(_dates_grouped())
 
 
 def get_available_months(year: str) -> list[str]:
-    g = _dates_grouped().get(year, {})
-    return sorted(g.keys())
+    return list(_dates_grouped().get(year, {}))
 
 
-def get_available_days(year: str, month: str) -> list[str]:
-    return sorted(_dates_grouped().get(year, {}).get(month, []))
+def get_day_weekdays(year: str, month: str) -> dict[str, str]:
+    """{day: weekday_abbr} for the month, days ascending."""
+    return _dates_grouped().get(year, {}).get(month, {})
 
 
 def pagination_keyboard(items: list[dict], page: int, prefix: str,
@@ -491,22 +710,43 @@ def pagination_keyboard(items: list[dict], page: int, prefix: str,
     return {"inline_keyboard": keyboard}
 
 
+def _reply(chat_id: int, message_id: int | None, text: str, keyboard: dict | None = None) -> None:
+    """Edit the message a button lives on, or send a new one for text commands."""
+    if message_id:
+        edit_message(chat_id, message_id, text, keyboard)
+    else:
+        send_message(chat_id, text, keyboard)
+
+
+# Year/month keyboards are identical for every user and only change when the
+# date index does. The index contents are part of the key, so a refreshed
+# index simply misses the cache. Returned dicts are shared: do not mutate.
+@functools.lru_cache(maxsize=64)
+def _years_keyboard(years: tuple[str, ...], page: int) -> dict:
+    items = [{"text": y, "callback_data": f"year:{y}"} for y in years]
+    return pagination_keyboard(items, page, "year",
+                               extra_rows=[[{"text": "⬅️ Back", "callback_data": "view:status"}]])
+
+
+@functools.lru_cache(maxsize=64)
+def _months_keyboard(months: tuple[str, ...], page: int) -> dict:
+    items = [{"text": f"{_MONTH_LABELS.get(num, num)} ({num})", "callback_data": f"month:{num}"}
+             for num in months]
+    return pagination_keyboard(items, page, "month",
+                               extra_rows=[[{"text": "⬅️ Back", "callback_data": "view:logs"}]])
+
+
 def show_years(chat_id: int, message_id: int | None = None) -> None:
     years = get_available_years()
     if not years:
         msg = "_No archived logs available yet._"
-        keyboard = {"inline_keyboard": [[{"text": "⬅️ Back", "callback_data": "view:status"}]]}
+        keyboard = _BACK_TO_STATUS_KB
     else:
         sess = get_session(chat_id)
         sess.stage = "year"
-        items = [{"text": y, "callback_data": f"year:{y}"} for y in years]
-        keyboard = pagination_keyboard(items, sess.page, "year",
-                                       extra_rows=[[{"text": "⬅️ Back", "callback_data": "view:status"}]])
+        keyboard = _years_keyboard(tuple(years), sess.page)
         msg = "*Logs · select a year*"
-    if message_id:
-        edit_message(chat_id, message_id, msg, keyboard)
-    else:
-        send_message(chat_id, msg, keyboard)
+    _reply(chat_id, message_id, msg, keyboard)
 
 
 def show_months(chat_id: int, message_id: int | None = None) -> None:
@@ -519,20 +759,14 @@ def show_months(chat_id: int, message_id: int | None = None) -> None:
         edit_message(chat_id, message_id or 0, f"_No data for {sess.year}._")
         return
     sess.stage = "month"
-    items = []
-    for num in months:
-        try:
-            name = _MONTH_ABBR[int(num) - 1]
-        except (ValueError, IndexError):
-            name = num
-        items.append({"text": f"{name} ({num})", "callback_data": f"month:{num}"})
-    keyboard = pagination_keyboard(items, sess.page, "month",
-                                   extra_rows=[[{"text": "⬅️ Back", "callback_data": "view:logs"}]])
+    keyboard = _months_keyboard(tuple(months), sess.page)
     msg = f"*Logs · {sess.year} · select month*"
-    if message_id:
-        edit_message(chat_id, message_id, msg, keyboard)
-    else:
-        send_message(chat_id, msg, keyboard)
+    _reply(chat_id, message_id, msg, keyboard)
+
+
+def _day_items(year: str, month: str) -> list[dict]:
+    return [{"text": f"{weekday} {day}", "callback_data": f"day:{day}"}
+            for day, weekday in get_day_weekdays(year, month).items()]
 
 
 def show_days(chat_id: int, message_id: int | None = None) -> None:
@@ -540,28 +774,64 @@ def show_days(chat_id: int, message_id: int | None = None) -> None:
     if not (sess.year and sess.month):
         show_months(chat_id, message_id)
         return
-    days = get_available_days(sess.year, sess.month)
-    if not days:
+    if sess.day_items is None:
+        sess.day_items = _day_items(sess.year, sess.month)
+    items = sess.day_items
+    if not items:
         edit_message(chat_id, message_id or 0, "_No days available._")
         return
     sess.stage = "day"
-    items = []
-    for day in days:
-        try:
-            d = dt.date(int(sess.year), int(sess.month), int(day))
-            label = f"{d.strftime('%a')} {day}"
-        except ValueError:
-            label = day
-        items.append({"text": label, "callback_data": f"day:{day}"})
     keyboard = pagination_keyboard(
         items, sess.page, "day",
         extra_rows=[[{"text": "⬅️ Back", "callback_data": "back:month"}]],
     )
     msg = f"*Logs · {sess.year}-{sess.month} · select day*"
-    if message_id:
-        edit_message(chat_id, message_id, msg, keyboard)
-    else:
-        send_message(chat_id, msg, keyboard)
+    _reply(chat_id, message_id, msg, keyboard)
+
+
+# Telegram file_id of every CSV we have already uploaded, keyed by
+# "<date>:<sha1 of content>". Re-sending a past day then references the
+# stored file instead of uploading it again. Persisted so restarts keep it.
+_FILE_ID_CACHE_FILE = os.path.join(sm.STATE_DIR, "bot_file_ids.json")
+_FILE_ID_CACHE_MAX = 256
+_GZIP_MIN_BYTES = 64 * 1024
+_file_ids: dict[str, str] | None = None
+_file_ids_lock = threading.Lock()
+
+
+def _load_file_ids() -> dict[str, str]:
+    """The shared cache dict; call with _file_ids_lock held."""
+    global _file_ids
+    if _file_ids is None:
+        try:
+            with open(_FILE_ID_CACHE_FILE, "rb") as f:
+                _file_ids = sm.json_loads(f.read())
+        except (ValueError, OSError):
+            _file_ids = {}
+    return _file_ids
+
+
+def _get_file_id(key: str) -> str | None:
+    with _file_ids_lock:
+        return _load_file_ids().get(key)
+
+
+def _set_file_id(key: str, file_id: str | None) -> None:
+    """Store (or with None, forget) a file_id and persist the cache."""
+    with _file_ids_lock:
+        cache = _load_file_ids()
+        if file_id is None:
+            cache.pop(key, None)
+        else:
+            cache[key] = file_id
+        while len(cache) > _FILE_ID_CACHE_MAX:
+            cache.pop(next(iter(cache)))
+        cache = dict(cache)
+    try:
+        os.makedirs(sm.STATE_DIR, exist_ok=True)
+        sm.write_json_atomic(_FILE_ID_CACHE_FILE, cache)
+    except OSError as e:
+        logger.warning("Could not persist file_id cache: %s", e)
 
 
 def send_csv_for_date(chat_id: int, date_iso: str, caption: str | None = None) -> bool:
@@ -570,11 +840,33 @@ def send_csv_for_date(chat_id: int, date_iso: str, caption: str | None = None) -
     if not data:
         send_message(chat_id, f"_No data for {date_iso}._")
         return False
+    raw = data.encode("utf-8")
     payload: dict[str, Any] = {"chat_id": chat_id}
     if caption:
         payload["caption"] = caption
-    files = {"document": (f"sysmon_{date_iso}.csv", io.BytesIO(data.encode("utf-8")), "text/csv")}
-    _post("sendDocument", payload, files=files)
+
+    key = f"{date_iso}:{hashlib.sha1(raw).hexdigest()}"
+    file_id = _get_file_id(key)
+    if file_id:
+        status, res = _call("sendDocument", {**payload, "document": file_id})
+        if res or status != 400:
+            # Sent, or network/server trouble: the file_id is still good and
+            # a full upload would most likely fail the same way.
+            return True
+        # Telegram no longer knows this file — forget it and upload again.
+        _set_file_id(key, None)
+
+    # Full days of samples compress ~8x; small exports aren't worth it.
+    if len(raw) > _GZIP_MIN_BYTES:
+        body = gzip.compress(raw, compresslevel=6, mtime=0)
+        document = (f"sysmon_{date_iso}.csv.gz", io.BytesIO(body), "application/gzip")
+    else:
+        document = (f"sysmon_{date_iso}.csv", io.BytesIO(raw), "text/csv")
+    files = {"document": document}
+    res = _post("sendDocument", payload, files=files)
+    file_id = ((res or {}).get("result") or {}).get("document", {}).get("file_id")
+    if file_id:
+        _set_file_id(key, file_id)
     return True
 
 
@@ -667,7 +959,7 @@ def cmd_net(chat_id: int, _args: str) -> None:
 
 def cmd_uptime(chat_id: int, _args: str) -> None:
     secs = time.time() - psutil.boot_time()
-    boot = datetime.fromtimestamp(psutil.boot_time()).strftime("%Y-%m-%d %H:%M")
+    boot = dt.datetime.fromtimestamp(psutil.boot_time()).strftime("%Y-%m-%d %H:%M")
     send_message(chat_id, f"*Uptime* `{sm.format_uptime(secs)}`\nBooted: `{boot}`")
 
 
@@ -707,7 +999,8 @@ def cmd_export(chat_id: int, args: str) -> None:
         send_message(chat_id, "_Usage: `/export YYYY-MM-DD`_")
         return
     try:
-        dt.datetime.strptime(date_iso, "%Y-%m-%d")
+        # Canonicalise too: 3.11+ fromisoformat also accepts "20240102".
+        date_iso = dt.date.fromisoformat(date_iso).isoformat()
     except ValueError:
         send_message(chat_id, "_Date must be YYYY-MM-DD._")
         return
@@ -1045,7 +1338,7 @@ def cmd_alerts_log(chat_id: int, args: str) -> None:
         return
     out = [f"*Last {len(rows)} alert events*"]
     for r in rows:
-        when = datetime.fromtimestamp(r["ts"]).strftime("%m-%d %H:%M")
+        when = dt.datetime.fromtimestamp(r["ts"]).strftime("%m-%d %H:%M")
         icon = {"breach": "⚠️", "recovery": "✅", "continued": "⏳"}.get(r["event"], "•")
         out.append(f"`{when}` {icon} {r['metric']} {r['event']}: {r['value']:.1f}/{r['threshold']:.1f}")
     send_message(chat_id, "\n".join(out))
@@ -1058,12 +1351,15 @@ def cmd_alerts_log(chat_id: int, args: str) -> None:
 # In-memory only (cleared on bot restart). Persisted state would require
 # coordinating with the logger process; one-shot ad-hoc semantics fit memory.
 WATCHES: list[dict] = []
+# Held while WATCHES is modified: commands run on worker threads while the
+# poll thread checks and prunes watches.
+_WATCHES_LOCK = threading.Lock()
 _WATCH_METRICS = {
     "cpu": "cpu_load", "ram": "ram_usage", "disk": "disk_usage",
     "temp": "temperature", "power": "power_w", "swap": "swap_used_mb",
     "load": "load_avg_1m",
 }
-_WATCH_OPS = {">", "<", ">=", "<="}
+_WATCH_OPS = {">": operator.gt, "<": operator.lt, ">=": operator.ge, "<=": operator.le}
 
 
 def cmd_watch(chat_id: int, args: str) -> None:
@@ -1084,11 +1380,13 @@ def cmd_watch(chat_id: int, args: str) -> None:
         except ValueError:
             send_message(chat_id, "_Usage: `/watch clear <id>` or `/watch clear all`._")
             return
-        WATCHES[:] = [w for w in WATCHES if not (w["chat_id"] == chat_id and w["id"] == wid)]
+        with _WATCHES_LOCK:
+            WATCHES[:] = [w for w in WATCHES if not (w["chat_id"] == chat_id and w["id"] == wid)]
         send_message(chat_id, f"Removed watch #{wid}.")
         return
     if parts == ["clear", "all"] or parts == ["clear"]:
-        WATCHES[:] = [w for w in WATCHES if w["chat_id"] != chat_id]
+        with _WATCHES_LOCK:
+            WATCHES[:] = [w for w in WATCHES if w["chat_id"] != chat_id]
         send_message(chat_id, "Cleared all watches.")
         return
     if len(parts) != 3:
@@ -1111,13 +1409,14 @@ def cmd_watch(chat_id: int, args: str) -> None:
     except ValueError:
         send_message(chat_id, "_Value must be numeric._")
         return
-    wid = (WATCHES[-1]["id"] + 1) if WATCHES else 1
-    WATCHES.append({
-        "id": wid, "chat_id": chat_id,
-        "metric": metric, "column": _WATCH_METRICS[metric],
-        "op": op, "value": value,
-        "created_ts": time.time(),
-    })
+    with _WATCHES_LOCK:
+        wid = (WATCHES[-1]["id"] + 1) if WATCHES else 1
+        WATCHES.append({
+            "id": wid, "chat_id": chat_id,
+            "metric": metric, "column": _WATCH_METRICS[metric],
+            "op": op, "value": value,
+            "created_ts": time.time(),
+        })
     send_message(chat_id, f"✅ Watch `#{wid}`: {metric} {op} {value} (one-shot).")
 
 
@@ -1128,21 +1427,22 @@ def _check_watches() -> None:
     last = sm.db_last_metric()
     if not last:
         return
-    fired: list[int] = []
-    for w in WATCHES:
+    fired: set[int] = set()
+    with _WATCHES_LOCK:
+        watches = list(WATCHES)
+    for w in watches:
         v = last.get(w["column"])
         if v is None:
             continue
         op = w["op"]
-        hit = (op == ">" and v > w["value"]) or (op == "<" and v < w["value"]) \
-            or (op == ">=" and v >= w["value"]) or (op == "<=" and v <= w["value"])
-        if hit:
+        if _WATCH_OPS[op](v, w["value"]):
             send_message(w["chat_id"],
                 f"🔔 *Watch #{w['id']} fired*\n"
                 f"{w['metric']} {op} {w['value']}  →  *{v:.2f}*")
-            fired.append(w["id"])
+            fired.add(w["id"])
     if fired:
-        WATCHES[:] = [w for w in WATCHES if w["id"] not in fired]
+        with _WATCHES_LOCK:
+            WATCHES[:] = [w for w in WATCHES if w["id"] not in fired]
 
 
 # ---------------------------------------------------------------------------
@@ -1153,6 +1453,10 @@ def _check_watches() -> None:
 DASHBOARDS: dict[int, dict] = {}
 DASHBOARD_DURATION_SECONDS = 600
 DASHBOARD_REFRESH_SECONDS = 30
+_DASHBOARD_KB = {"inline_keyboard": [[
+    {"text": "⏹ Stop", "callback_data": "dash:stop"},
+    {"text": "🔄 Now", "callback_data": "dash:now"},
+]]}
 
 
 def cmd_dashboard(chat_id: int, args: str) -> None:
@@ -1163,12 +1467,8 @@ def cmd_dashboard(chat_id: int, args: str) -> None:
     text, _ = render_status_compact()
     text = "📡 *Live dashboard (auto-refreshes)*\n\n" + text + \
            f"\n_Updates every {DASHBOARD_REFRESH_SECONDS}s for {DASHBOARD_DURATION_SECONDS//60} min._"
-    kb = {"inline_keyboard": [[
-        {"text": "⏹ Stop", "callback_data": "dash:stop"},
-        {"text": "🔄 Now", "callback_data": "dash:now"},
-    ]]}
     payload = {"chat_id": chat_id, "text": text, "parse_mode": "Markdown",
-               "disable_web_page_preview": True, "reply_markup": kb}
+               "disable_web_page_preview": True, "reply_markup": _DASHBOARD_KB}
     res = _post("sendMessage", payload)
     if not res or not res.get("ok"):
         return
@@ -1184,7 +1484,8 @@ def cmd_dashboard(chat_id: int, args: str) -> None:
 def _refresh_dashboards() -> None:
     now = time.time()
     expired: list[int] = []
-    for chat_id, d in DASHBOARDS.items():
+    # Snapshot: worker threads may add/remove dashboards while we iterate.
+    for chat_id, d in list(DASHBOARDS.items()):
         if now >= d["expires_ts"]:
             expired.append(chat_id)
             continue
@@ -1194,11 +1495,7 @@ def _refresh_dashboards() -> None:
             text, _ = render_status_compact()
             text = "📡 *Live dashboard*\n\n" + text + \
                    f"\n_Next refresh in {DASHBOARD_REFRESH_SECONDS}s_"
-            kb = {"inline_keyboard": [[
-                {"text": "⏹ Stop", "callback_data": "dash:stop"},
-                {"text": "🔄 Now", "callback_data": "dash:now"},
-            ]]}
-            edit_message(chat_id, d["message_id"], text, kb)
+            edit_message(chat_id, d["message_id"], text, _DASHBOARD_KB)
         except Exception:
             logger.exception("dashboard refresh failed for %s", chat_id)
         d["next_refresh_ts"] = now + DASHBOARD_REFRESH_SECONDS
@@ -1226,13 +1523,13 @@ def cmd_logs(chat_id: int, args: str) -> None:
     ]
     out = []
     for label, p in paths:
-        if not os.path.exists(p):
-            continue
         try:
             with open(p, "r", encoding="utf-8", errors="replace") as f:
                 tail = f.readlines()[-n:]
             out.append(f"*{label}* (last {len(tail)} lines)")
             out.append(code_block("".join(tail)[-3500:]))
+        except FileNotFoundError:
+            continue
         except OSError as e:
             out.append(f"_{label}: {e}_")
     send_message(chat_id, "\n".join(out) if out else "_No log files found._")
@@ -1241,12 +1538,14 @@ def cmd_logs(chat_id: int, args: str) -> None:
 def cmd_restart(chat_id: int, _args: str) -> None:
     send_message(chat_id, "♻️ Restarting bot now. (Service supervisor will bring it back up.)")
     logger.info("restart requested via telegram by chat %s", chat_id)
-    # Exit cleanly so systemd/Task Scheduler relaunches us.
+    # Exit cleanly so systemd/Task Scheduler relaunches us. os._exit skips
+    # atexit, so flush the queued log records first.
+    sm.flush_logging()
     os._exit(0)
 
 
 def cmd_dbbackup(chat_id: int, _args: str) -> None:
-    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    stamp = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
     dest = os.path.join(sm.LOG_DIR, f"sysmon_backup_{stamp}.db")
     import sqlite3
     src = sqlite3.connect(sm.DB_PATH)
@@ -1265,10 +1564,13 @@ def cmd_dbbackup(chat_id: int, _args: str) -> None:
 
 
 def cmd_getlog(chat_id: int, _args: str) -> None:
+    # An explicit /getlog always starts from a fresh date index.
+    invalidate_dates_cache()
     sess = get_session(chat_id)
     sess.page = 0
     sess.year = None
     sess.month = None
+    sess.day_items = None
     show_years(chat_id)
 
 
@@ -1340,154 +1642,170 @@ COMMANDS: dict[str, Callable[[int, str], None]] = {
 # Callback (inline button) routing
 # ---------------------------------------------------------------------------
 
-def handle_callback(cb: dict) -> None:
-    chat_id = cb["message"]["chat"]["id"]
-    message_id = cb["message"]["message_id"]
-    user_id = cb["from"]["id"]
-    data = cb.get("data", "")
-    cb_id = cb["id"]
-
-    if not is_authorized(user_id, cb.get("from")):
-        # Don't call answerCallbackQuery — saves an API request. The user's
-        # spinner just times out client-side; no signal that the bot exists.
-        return
+_BACK_TO_STATUS_KB = {"inline_keyboard": [[{"text": "⬅️ Back", "callback_data": "view:status"}]]}
+_LOG_SENT_KB = {"inline_keyboard": [[{"text": "⬅️ Back to status", "callback_data": "view:status"}]]}
+_SUMMARY_KB = {"inline_keyboard": [
+    [{"text": "24h", "callback_data": "sum:24"},
+     {"text": "72h", "callback_data": "sum:72"},
+     {"text": "7d",  "callback_data": "sum:168"}],
+    [{"text": "⬅️ Back", "callback_data": "view:status"}],
+]}
 
-    sess = get_session(chat_id)
 
-    if data == "noop":
-        answer_callback(cb_id)
-        return
+def _cb_view(chat_id: int, message_id: int, sess: Session, view: str) -> None:
+    if view == "status":
+        text, kb = render_status_compact()
+        edit_message(chat_id, message_id, text, kb)
+    elif view == "detail":
+        edit_message(chat_id, message_id, render_detail(), _BACK_TO_STATUS_KB)
+    elif view == "top":
+        text, kb = render_top(sess.proc_sort)
+        edit_message(chat_id, message_id, text, kb)
+    elif view == "disks":
+        edit_message(chat_id, message_id, render_disks(), _BACK_TO_STATUS_KB)
+    elif view == "net":
+        edit_message(chat_id, message_id, render_net(), _BACK_TO_STATUS_KB)
+    elif view == "summary24":
+        edit_message(chat_id, message_id, render_summary(24), _SUMMARY_KB)
+    elif view == "logs":
+        sess.page = 0
+        show_years(chat_id, message_id)
+    elif view == "settings":
+        text, kb = render_settings()
+        edit_message(chat_id, message_id, text, kb)
 
-    answer_callback(cb_id)  # always ack so spinner disappears
-
-    if data.startswith("view:"):
-        view = data.split(":", 1)[1]
-        if view == "status":
-            text, kb = render_status_compact()
-            edit_message(chat_id, message_id, text, kb)
-        elif view == "detail":
-            kb = {"inline_keyboard": [[{"text": "⬅️ Back", "callback_data": "view:status"}]]}
-            edit_message(chat_id, message_id, render_detail(), kb)
-        elif view == "top":
-            text, kb = render_top(sess.proc_sort)
-            edit_message(chat_id, message_id, text, kb)
-        elif view == "disks":
-            kb = {"inline_keyboard": [[{"text": "⬅️ Back", "callback_data": "view:status"}]]}
-            edit_message(chat_id, message_id, render_disks(), kb)
-        elif view == "net":
-            kb = {"inline_keyboard": [[{"text": "⬅️ Back", "callback_data": "view:status"}]]}
-            edit_message(chat_id, message_id, render_net(), kb)
-        elif view == "summary24":
-            kb = {"inline_keyboard": [
-                [{"text": "24h", "callback_data": "sum:24"},
-                 {"text": "72h", "callback_data": "sum:72"},
-                 {"text": "7d",  "callback_data": "sum:168"}],
-                [{"text": "⬅️ Back", "callback_data": "view:status"}],
-            ]}
-            edit_message(chat_id, message_id, render_summary(24), kb)
-        elif view == "logs":
-            sess.page = 0
-            show_years(chat_id, message_id)
-        elif view == "settings":
-            text, kb = render_settings()
-            edit_message(chat_id, message_id, text, kb)
-        return
 
-    if data == "dash:stop":
+def _cb_dash(chat_id: int, _message_id: int, _sess: Session, action: str) -> None:
+    if action == "stop":
         d = DASHBOARDS.pop(chat_id, None)
         if d:
             text, _ = render_status_compact()
             edit_message(chat_id, d["message_id"], "📡 *Dashboard stopped*\n\n" + text)
-        return
-
-    if data == "dash:now":
+    elif action == "now":
         if chat_id in DASHBOARDS:
             DASHBOARDS[chat_id]["next_refresh_ts"] = 0  # force refresh next loop tick
-        return
 
-    if data.startswith("sum:"):
-        hours = int(data.split(":", 1)[1])
-        kb = {"inline_keyboard": [
-            [{"text": "24h", "callback_data": "sum:24"},
-             {"text": "72h", "callback_data": "sum:72"},
-             {"text": "7d",  "callback_data": "sum:168"}],
-            [{"text": "⬅️ Back", "callback_data": "view:status"}],
-        ]}
-        edit_message(chat_id, message_id, render_summary(hours), kb)
-        return
 
-    if data.startswith("top:"):
-        sort_by = data.split(":", 1)[1]
-        sess.proc_sort = sort_by
-        text, kb = render_top(sort_by)
-        edit_message(chat_id, message_id, text, kb)
-        return
+def _cb_sum(chat_id: int, message_id: int, _sess: Session, arg: str) -> None:
+    edit_message(chat_id, message_id, render_summary(int(arg)), _SUMMARY_KB)
 
-    if data == "alerts:toggle":
-        a = CONFIG.setdefault("alerts", {})
-        a["enabled"] = not a.get("enabled", True)
-        sm.save_config(CONFIG)
-        text, kb = render_settings()
-        edit_message(chat_id, message_id, text, kb)
-        return
 
-    if data.startswith("page:"):
-        _, prefix, page_str = data.split(":", 2)
-        sess.page = int(page_str)
-        if prefix == "year":
-            show_years(chat_id, message_id)
-        elif prefix == "month":
-            show_months(chat_id, message_id)
-        elif prefix == "day":
-            show_days(chat_id, message_id)
-        return
+def _cb_top(chat_id: int, message_id: int, sess: Session, sort_by: str) -> None:
+    sess.proc_sort = sort_by
+    text, kb = render_top(sort_by)
+    edit_message(chat_id, message_id, text, kb)
 
-    if data.startswith("back:"):
-        target = data.split(":", 1)[1]
-        sess.page = 0
-        if target == "month":
-            show_months(chat_id, message_id)
-        elif target == "year":
-            show_years(chat_id, message_id)
-        else:
-            text, kb = render_status_compact()
-            edit_message(chat_id, message_id, text, kb)
+
+def _cb_alerts(chat_id: int, message_id: int, _sess: Session, action: str) -> None:
+    if action != "toggle":
         return
+    a = CONFIG.setdefault("alerts", {})
+    a["enabled"] = not a.get("enabled", True)
+    sm.save_config(CONFIG)
+    text, kb = render_settings()
+    edit_message(chat_id, message_id, text, kb)
 
-    if data.startswith("year:"):
-        sess.year = data.split(":", 1)[1]
-        sess.page = 0
+
+def _cb_page(chat_id: int, message_id: int, sess: Session, arg: str) -> None:
+    prefix, _, page_str = arg.partition(":")
+    sess.page = int(page_str)
+    if prefix == "year":
+        show_years(chat_id, message_id)
+    elif prefix == "month":
         show_months(chat_id, message_id)
+    elif prefix == "day":
+        show_days(chat_id, message_id)
+
+
+def _cb_back(chat_id: int, message_id: int, sess: Session, target: str) -> None:
+    sess.page = 0
+    if target == "month":
+        show_months(chat_id, message_id)
+    elif target == "year":
+        show_years(chat_id, message_id)
+    else:
+        text, kb = render_status_compact()
+        edit_message(chat_id, message_id, text, kb)
+
+
+def _cb_year(chat_id: int, message_id: int, sess: Session, year: str) -> None:
+    sess.year = year
+    sess.day_items = None
+    sess.page = 0
+    show_months(chat_id, message_id)
+
+
+def _cb_month(chat_id: int, message_id: int, sess: Session, month: str) -> None:
+    sess.month = month
+    sess.day_items = None
+    sess.page = 0
+    show_days(chat_id, message_id)
+
+
+def _cb_day(chat_id: int, message_id: int, sess: Session, day: str) -> None:
+    if not (sess.year and sess.month):
+        edit_message(chat_id, message_id, "_Pick a year/month first._")
         return
+    date_iso = f"{sess.year}-{sess.month}-{day}"
+    sent = send_csv_for_date(chat_id, date_iso, caption=f"Metrics · {date_iso}")
+    edit_message(chat_id, message_id, "✅ Log sent." if sent else f"_No data for {date_iso}._",
+                 _LOG_SENT_KB)
+
+
+# callback_data is "<prefix>:<arg>"; handlers get (chat_id, message_id, session, arg).
+CALLBACKS: dict[str, Callable[[int, int, Session, str], None]] = {
+    "view": _cb_view,
+    "dash": _cb_dash,
+    "sum": _cb_sum,
+    "top": _cb_top,
+    "alerts": _cb_alerts,
+    "page": _cb_page,
+    "back": _cb_back,
+    "year": _cb_year,
+    "month": _cb_month,
+    "day": _cb_day,
+}
 
-    if data.startswith("month:"):
-        sess.month = data.split(":", 1)[1]
-        sess.page = 0
-        show_days(chat_id, message_id)
+
+def handle_callback(cb: dict) -> None:
+    message = cb.get("message")
+    if message is None:  # inline-mode button: no chat to edit
         return
+    chat_id = message["chat"]["id"]
+    message_id = message["message_id"]
+    frm = cb["from"]
+    data = cb.get("data", "")
+    cb_id = cb["id"]
 
-    if data.startswith("day:"):
-        day = data.split(":", 1)[1]
-        if not (sess.year and sess.month):
-            edit_message(chat_id, message_id, "_Pick a year/month first._")
-            return
-        date_iso = f"{sess.year}-{sess.month}-{day}"
-        sent = send_csv_for_date(chat_id, date_iso, caption=f"Metrics · {date_iso}")
-        kb = {"inline_keyboard": [[{"text": "⬅️ Back to status", "callback_data": "view:status"}]]}
-        edit_message(chat_id, message_id, "✅ Log sent." if sent else f"_No data for {date_iso}._", kb)
+    if not is_authorized(frm["id"], frm):
+        # Don't call answerCallbackQuery — saves an API request. The user's
+        # spinner just times out client-side; no signal that the bot exists.
         return
 
+    sess = get_session(chat_id)
+    # Always ack so the spinner disappears. Fire-and-forget on its own pool
+    # so the round-trip overlaps with the edit/upload below without queueing
+    # behind the update backlog on _EXECUTOR.
+    _ACK_EXECUTOR.submit(answer_callback, cb_id)
+
+    prefix, _, arg = data.partition(":")
+    handler = CALLBACKS.get(prefix)
+    if handler is not None:
+        handler(chat_id, message_id, sess, arg)
+
 
 # ---------------------------------------------------------------------------
 # Message dispatch
 # ---------------------------------------------------------------------------
 
 def handle_message(msg: dict) -> None:
+    frm = msg.get("from")
+    if frm is None:  # e.g. anonymous group admins; no user to authorize
+        return
     chat_id = msg["chat"]["id"]
-    user_id = msg["from"]["id"]
     text = msg.get("text", "")
 
-    if not is_authorized(user_id, msg.get("from")):
+    if not is_authorized(frm["id"], frm):
         # Silent drop — don't reveal the bot exists. Attempt is rate-limit logged.
         return
 
@@ -1526,55 +1844,185 @@ def _load_offset() -> int | None:
     return sm.load_state().get("bot_offset")
 
 
+# Updates run on a small thread pool so a slow upload or shell command does
+# not hold up the next getUpdates. Each chat has a FIFO of waiting updates
+# drained by at most one task at a time: a chat's updates stay in order and
+# a burst from one chat never parks workers that another chat could use.
+# Telegram is only told to drop an update (the getUpdates offset) once it
+# has been handled, and the persisted offset follows the same rule.
+_EXECUTOR = ThreadPoolExecutor(max_workers=BOT_WORKERS, thread_name_prefix="bot-worker")
+_ACK_EXECUTOR = ThreadPoolExecutor(max_workers=ACK_WORKERS, thread_name_prefix="bot-ack")
+_PENDING_UPDATES = threading.BoundedSemaphore(64)
+_updates_cond = threading.Condition()
+# chat_id -> (handler, obj, update_id) not yet started; present while a drain task exists.
+_chat_queues: dict[int, deque[tuple[Callable[[dict], None], dict, int]]] = {}
+_inflight: set[int] = set()
+_next_update_id: int | None = None
+
+
+def _ack_offset() -> int | None:
+    """Lowest update_id not yet handled; call with _updates_cond held."""
+    return min(_inflight) if _inflight else _next_update_id
+
+
+def _route(update: dict) -> tuple[Callable[[dict], None], dict, int | None] | None:
+    """(handler, obj, chat_id to serialise on) for an update, or None to skip it."""
+    cb = update.get("callback_query")
+    if cb is not None:
+        # Inline-mode callbacks carry no message/chat; nothing to answer in.
+        holder, handler, obj = cb.get("message"), handle_callback, cb
+    else:
+        holder, handler, obj = update.get("message"), handle_message, update.get("message")
+    if holder is None or obj.get("from") is None:
+        return None
+    if obj["from"].get("id") not in AUTHORIZED_USERS:
+        # Rejected (and rate-limit logged) by the handler; strangers get no queue.
+        return handler, obj, None
+    return handler, obj, holder["chat"]["id"]
+
+
+def _run_update(handler: Callable[[dict], None], obj: dict, update_id: int) -> None:
+    try:
+        handler(obj)
+    except Exception:
+        logger.exception("update handler crashed")
+    finally:
+        with _updates_cond:
+            _inflight.discard(update_id)
+            _updates_cond.notify_all()
+        _PENDING_UPDATES.release()
+
+
+def _drain_chat(chat_id: int) -> None:
+    with _updates_cond:
+        item = _chat_queues[chat_id].popleft()
+    _run_update(*item)
+    with _updates_cond:
+        if _chat_queues[chat_id]:
+            # Back of the executor queue, so busy chats take turns.
+            _EXECUTOR.submit(_drain_chat, chat_id)
+        else:
+            del _chat_queues[chat_id]
+
+
+def _submit_update(update: dict) -> None:
+    global _next_update_id
+    update_id = update["update_id"]
+    try:
+        routed = _route(update)
+    except Exception:
+        logger.exception("malformed update %s", update_id)
+        routed = None
+    if routed is not None:
+        _PENDING_UPDATES.acquire()  # blocks polling while the backlog is full
+    with _updates_cond:
+        _next_update_id = max(_next_update_id or 0, update_id + 1)
+        if routed is None:
+            return
+        handler, obj, chat_id = routed
+        item = (handler, obj, update_id)
+        _inflight.add(update_id)
+        if chat_id is None:
+            _EXECUTOR.submit(_run_update, *item)
+        elif chat_id in _chat_queues:
+            _chat_queues[chat_id].append(item)
+        else:
+            _chat_queues[chat_id] = deque([item])
+            _EXECUTOR.submit(_drain_chat, chat_id)
+
+
 def poll_loop() -> None:
     sm.db_init(auto_migrate=bool(CONFIG.get("storage", {}).get("auto_migrate_csv", True)))
-    offset = _load_offset()
+    global _next_update_id
+    saved_offset = _next_update_id = _load_offset()
+    # Seed psutil's "since last call" CPU counters so the first non-blocking
+    # /status after startup reports a real value instead of 0.0.
+    psutil.cpu_percent(interval=None)
+    psutil.cpu_times_percent(interval=None)
     stats = sm.db_stats()
     logger.info(
         "Bot starting · users=%d · poll_timeout=%ds · db_rows=%d",
         len(AUTHORIZED_USERS), POLL_TIMEOUT, stats["rows"],
     )
     backoff = 1.0
+    busy = False
     while True:
         try:
             # Use shorter polling when there are active dashboards or watches
-            # so we can refresh / check them on time.
-            active = bool(DASHBOARDS or WATCHES)
+            # so we can refresh / check them on time. After a non-empty batch
+            # too: a /dashboard or /watch in it may not be registered yet.
+            active = busy or bool(DASHBOARDS or WATCHES)
             poll = 10 if active else POLL_TIMEOUT
-            params = {"timeout": poll, "allowed_updates": ["message", "callback_query"]}
+            with _updates_cond:
+                offset = _ack_offset()
+            params = {"timeout": poll, "allowed_updates": ALLOWED_UPDATES}
             if offset is not None:
                 params["offset"] = offset
-            r = SESSION.get(f"{API_URL}/getUpdates", params=params, timeout=poll + 10)
+            r = SESSION.get(f"{API_URL}/getUpdates", params=params,
+                            timeout=(CONNECT_TIMEOUT, poll + 10))
+            if r.status_code == 429:
+                wait = _retry_after(r) or backoff
+                logger.warning("getUpdates rate limited; sleeping %.0fs", wait)
+                time.sleep(wait + _jitter())
+                continue
             if r.status_code != 200:
                 logger.warning("getUpdates %s: %s", r.status_code, r.text[:200])
-                time.sleep(min(backoff, 30))
+                time.sleep(min(backoff, 30) + _jitter())
                 backoff = min(backoff * 2, 30)
                 continue
+            raw = r.content
+            # Idle long-polls return exactly {"ok":true,"result":[]}; skip the
+            # JSON decode for those and go straight to housekeeping.
+            if raw.endswith(_EMPTY_RESULT):
+                updates = []
+            else:
+                body = sm.json_loads(raw)
+                updates = body.get("result") if isinstance(body, dict) else None
+                if not isinstance(updates, list):
+                    raise ValueError(f"no result list in {raw[:100]!r}")
+                # An item without an int update_id can't be acked or handled.
+                updates = [u for u in updates
+                           if isinstance(u, dict) and isinstance(u.get("update_id"), int)]
             backoff = 1.0
-            data = r.json()
-            for update in data.get("result", []):
-                offset = update["update_id"] + 1
-                try:
-                    if "callback_query" in update:
-                        handle_callback(update["callback_query"])
-                    elif "message" in update:
-                        handle_message(update["message"])
-                except Exception:
-                    logger.exception("update handler crashed")
-            if data.get("result"):
-                _save_offset(offset)  # persist only on progress
+            with _updates_cond:
+                seen = _next_update_id
+            # Updates still being handled are delivered again until acked.
+            fresh = [u for u in updates if seen is None or u["update_id"] >= seen]
+            for update in fresh:
+                _submit_update(update)
+            busy = bool(updates)
+            with _updates_cond:
+                if updates and not fresh:
+                    # Only updates still being handled came back, and Telegram
+                    # answers at once while they are unacked. Sleep until a
+                    # handler finishes and the offset moves, bounded by the
+                    # poll timeout so housekeeping and other chats still get
+                    # a turn during a long upload or shell command.
+                    _updates_cond.wait_for(lambda: _ack_offset() != offset, timeout=poll)
+                done = _ack_offset()
+            if done is not None and done != saved_offset:
+                _save_offset(done)  # persist only on progress
+                saved_offset = done
 
             # Background housekeeping after each getUpdates cycle
             try:
                 _refresh_dashboards()
                 _check_watches()
+                _sweep_sessions()
             except Exception:
                 logger.exception("housekeeping crashed")
         except requests.exceptions.Timeout:
             continue
         except requests.exceptions.RequestException as e:
             logger.warning("Network error: %s", e)
-            time.sleep(min(backoff, 30))
+            time.sleep(min(backoff, 30) + _jitter())
+            backoff = min(backoff * 2, 30)
+        except ValueError as e:
+            # A 200 whose body isn't JSON or lacks a result list (captive
+            # portal, truncated proxy reply): back off like a network error
+            # instead of dying.
+            logger.warning("getUpdates returned a malformed reply: %s", e)
+            time.sleep(min(backoff, 30) + _jitter())
             backoff = min(backoff * 2, 30)
         except KeyboardInterrupt:
             logger.info("Interrupted — shutting down.")
@@ -1586,7 +2034,8 @@ def _signal_handler(signum, _frame) -> None:
     sys.exit(0)
 
 
-if __name__ == "__main__":
+def main() -> None:
+    """Entry point for both `python tg_bot_loop.py` and `sysmon bot run`."""
     signal.signal(signal.SIGINT, _signal_handler)
     # SIGTERM exists on Windows but cannot have a handler installed via
     # signal.signal() — guard so we don't crash on startup there.
@@ -1596,3 +2045,7 @@ if __name__ == "__main__":
         except (ValueError, OSError, AttributeError):
             pass
     poll_loop()
+
+
+if __name__ == "__main__":
+    main()